@@ -1,24 +1,66 @@
 import boto3
 import json
+from botocore.config import Config
 from os import getenv
 
 from cirruslib import Catalog, StateDB, get_task_logger
 
+try:
+    import orjson
+
+    json_loads = orjson.loads
+
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
 # envvars
 FAILED_TOPIC_ARN = getenv('CIRRUS_FAILED_TOPIC_ARN', None)
 
+# SNS message attributes for failed items
+ATTR_KEYS = ('collections', 'workflow', 'error')
+
 # boto3 clients
-SNS_CLIENT = boto3.client('sns')
-LOG_CLIENT = boto3.client('logs')
+# short timeouts so retries fit in the Lambda timeout (tasks/lambdas.yml)
+BOTO3_CONFIG = Config(
+    retries={'mode': 'adaptive', 'max_attempts': 5},
+    connect_timeout=1,
+    read_timeout=3
+)
+# created on first use, SNS only needed if publishing and Logs only for Batch errors
+SNS_CLIENT = None
+LOG_CLIENT = None
 
 # Cirrus state database
 statedb = StateDB()
 
 
+def sns_client():
+    global SNS_CLIENT
+    if SNS_CLIENT is None:
+        SNS_CLIENT = boto3.client('sns', config=BOTO3_CONFIG)
+    return SNS_CLIENT
+
+
+def log_client():
+    global LOG_CLIENT
+    if LOG_CLIENT is None:
+        LOG_CLIENT = boto3.client('logs', config=BOTO3_CONFIG)
+    return LOG_CLIENT
+
+
 def get_error_from_batch(logname):
     try:
-        logs = LOG_CLIENT.get_log_events(logGroupName='/aws/batch/job', logStreamName=logname)
-        msg = logs['events'][-1]['message'].lstrip('cirruslib.errors.')
+        # only the most recent event is needed
+        logs = log_client().get_log_events(logGroupName='/aws/batch/job', logStreamName=logname,
+                                           startFromHead=False, limit=1)
+        msg = logs['events'][-1]['message']
+        # strip module prefix from error class name (str.removeprefix requires Python 3.9)
+        prefix = 'cirruslib.errors.'
+        if msg.startswith(prefix):
+            msg = msg[len(prefix):]
         parts = msg.split(':', maxsplit=1)
         if len(parts) > 1:
             error_type = parts[0]
@@ -39,24 +81,30 @@ def handler(payload, context):
     # error type
     error_type = error.get('Error', "unknown")
 
+    # error message, unless cause is JSON
+    error_msg = error.get('Cause', 'unknown')
+
     # check if cause is JSON
     try:
-        cause = json.loads(error['Cause'])
+        cause = json_loads(error_msg)
+    except (TypeError, ValueError):
+        cause = None
+
+    if isinstance(cause, dict):
         error_msg = 'unknown'
         if 'errorMessage' in cause:
-            error_msg = cause.get('errorMessage', 'unknown')
-        elif 'Attempts' in cause:
-            try:
-                # batch
-                reason = cause['Attempts'][-1]['StatusReason']
-                if 'Essential container in task exited' in reason:
+            error_msg = cause['errorMessage'] or 'unknown'
+        else:
+            # batch
+            attempts = cause.get('Attempts')
+            attempt = attempts[-1] if isinstance(attempts, list) and attempts else None
+            if isinstance(attempt, dict):
+                reason = attempt.get('StatusReason') or ''
+                container = attempt.get('Container') or {}
+                logname = container.get('LogStreamName') if isinstance(container, dict) else None
+                if isinstance(reason, str) and 'Essential container in task exited' in reason and logname:
                     # get the message from batch logs
-                    logname = cause['Attempts'][-1]['Container']['LogStreamName']
                     error_type, error_msg = get_error_from_batch(logname)
-            except Exception as err:
-                logger.error(err, exc_info=True)
-    except Exception:
-        error_msg = error['Cause']
 
     error = f"{error_type}: {error_msg}"
     logger.info(error)
@@ -74,22 +122,10 @@ def handler(payload, context):
     if FAILED_TOPIC_ARN is not None:
         try:
             item = statedb.dbitem_to_item(statedb.get_dbitem(catalog['id']))
-            attrs = {
-                'collections': {
-                    'DataType': 'String',
-                    'StringValue': item['collections']
-                },
-                'workflow': {
-                    'DataType': 'String',
-                    'StringValue': item['workflow']
-                },
-                'error': {
-                    'DataType': 'String',
-                    'StringValue': error
-                }
-            }
+            values = (item['collections'], item['workflow'], error)
+            attrs = {k: {'DataType': 'String', 'StringValue': v} for k, v in zip(ATTR_KEYS, values)}
             logger.debug(f"Publishing item to {FAILED_TOPIC_ARN}")
-            SNS_CLIENT.publish(TopicArn=FAILED_TOPIC_ARN, Message=json.dumps(item), MessageAttributes=attrs)
+            sns_client().publish(TopicArn=FAILED_TOPIC_ARN, Message=json_dumps(item), MessageAttributes=attrs)
         except Exception as err:
             msg = f"Failed publishing to {FAILED_TOPIC_ARN}: {err}"
             logger.error(msg, exc_info=True)